@@ -22,87 +22,35 @@ import json
 import re
 import sys
 from datetime import date, datetime, timedelta
-from typing import Optional, List, Dict
+from operator import itemgetter
+from typing import Optional, List, Dict, Tuple
 
 from playwright.sync_api import sync_playwright, TimeoutError as PWTimeout
 
-SOURCE_URL = "https://www.mikeball.com/availability-mike-ball-dive-expeditions/"
+from scripts.scrape_common import (
+    SOURCE_URL,
+    extract_int_in_text,
+    fmt_picker,
+    norm_availability,
+    parse_money_to_int,
+    to_date_obj,
+    within_window,
+)
 
-# ====================== Basic helpers ======================
+_YEAR_RE = re.compile(r"\d{4}")
 
-def parse_money_to_int(s: Optional[str]) -> Optional[int]:
-    """
-    Convert '$4,802' to 4802 (AUD integer). Returns None if not parseable.
-    """
-    if not s:
-        return None
-    v = re.sub(r"[^\d.]", "", s)
-    if not v:
-        return None
-    try:
-        return int(round(float(v)))
-    except Exception:
-        return None
-
-def to_date_obj(txt: str) -> Optional[date]:
-    """
-    Accepts 'Thu 11 Sep 2025' or '11 Sep 2025' or '11 September 2025'.
-    Returns a date or None.
-    """
-    if not txt:
-        return None
-    clean = re.sub(r"^(Mon|Tue|Wed|Thu|Fri|Sat|Sun)\s+", "", txt.strip(), flags=re.I)
-    for fmt in ("%d %b %Y", "%d %B %Y"):
-        try:
-            return datetime.strptime(clean, fmt).date()
-        except ValueError:
-            pass
-    return None
-
-def norm_availability(s: str) -> str:
-    """
-    Normalize availability text to consistent labels for your page.
-    """
-    t = (s or "").strip().lower()
-    if "sold" in t:
-        return "Sold Out"
-    if "hurry" in t or "few" in t:
-        return "Few left"
-    if "10+" in t or "avail" in t:
-        return "Available"
-    return s.strip() if s else "—"
-
-def extract_int_in_text(s: str) -> Optional[int]:
-    """
-    First integer found in text: '10+ - See more' -> 10
-    """
-    if not s:
-        return None
-    m = re.search(r"\d+", s)
-    if m:
-        try:
-            return int(m.group())
-        except Exception:
-            return None
-    return None
-
-def within_window(d: Optional[date], start: Optional[date], end: Optional[date]) -> bool:
-    if not d:
-        return False
-    if start and d < start:
-        return False
-    if end and d > end:
-        return False
-    return True
+# Stylesheets stay allowed: the datepicker checks rely on computed styles.
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+BLOCKED_URL_PARTS = ("googletagmanager", "google-analytics", "facebook", "hotjar", "doubleclick")
 
 # ====================== Page/form helpers ======================
 
-def fmt_picker(d: date) -> str:
-    """
-    Resco’s datepicker accepts human-readable text; this format works:
-    "Friday 12 September 2025"
-    """
-    return d.strftime("%A %d %B %Y")
+def _block_heavy_requests(route):
+    req = route.request
+    if req.resource_type in BLOCKED_RESOURCE_TYPES or any(p in req.url for p in BLOCKED_URL_PARTS):
+        route.abort()
+    else:
+        route.continue_()
 
 def _select_material_date(page, input_selector: str, target_d: date):
     """
@@ -121,7 +69,6 @@ def _select_material_date(page, input_selector: str, target_d: date):
     }
 
     page.click(input_selector)
-    page.wait_for_timeout(300)
 
     dtp_id = page.locator(input_selector).get_attribute("data-dtp")
     if not dtp_id:
@@ -144,7 +91,7 @@ def _select_material_date(page, input_selector: str, target_d: date):
 
         month_key = month_label[:4] if month_label[:4] in month_map else month_label[:3]
         current_month = month_map.get(month_key)
-        current_year_match = re.search(r"\d{4}", year_text)
+        current_year_match = _YEAR_RE.search(year_text)
 
         if not current_month or not current_year_match:
             raise RuntimeError(f"Could not read datepicker month/year: {month_label} {year_text}")
@@ -160,7 +107,16 @@ def _select_material_date(page, input_selector: str, target_d: date):
         else:
             page.click(f"{picker} .dtp-select-month-before")
 
-        page.wait_for_timeout(150)
+        # Wait for the header to change instead of sleeping a fixed 150 ms
+        page.wait_for_function(
+            """([picker, before]) => {
+                const m = document.querySelector(picker + " .dtp-actual-month");
+                const y = document.querySelector(picker + " .dtp-actual-year");
+                return m && y && (m.innerText.trim().toUpperCase() + " " + y.innerText.trim()) !== before;
+            }""",
+            [picker, f"{month_label} {year_text}"],
+            timeout=5000
+        )
     else:
         raise RuntimeError(f"Could not navigate datepicker to {target_d.isoformat()}")
 
@@ -169,67 +125,92 @@ def _select_material_date(page, input_selector: str, target_d: date):
         day = page.locator(f"{picker} a.dtp-select-day", has_text=f"{target_d.day:02d}")
 
     day.first.click()
-    page.wait_for_timeout(200)
+    page.wait_for_selector(f"{picker} a.dtp-select-day.selected", timeout=2000)
 
     page.click(f"{picker} button.dtp-btn-ok")
-    page.wait_for_timeout(500)
+    page.wait_for_function(
+        """id => {
+            const el = document.getElementById(id);
+            return !el || el.classList.contains("hidden") || getComputedStyle(el).display === "none";
+        }""",
+        dtp_id,
+        timeout=5000
+    )
 def extract_from_results(page, start_date: Optional[date], end_date: Optional[date]) -> List[Dict]:
     """
     Parse the summary rows and the immediate details (cabins) row if present.
+    The DOM is read in one page.evaluate() call rather than one CDP round-trip
+    per cell; everything after that is plain Python.
     """
-    trips: List[Dict] = []
-    rows = page.locator("#availability-results table tbody tr")
-    rcount = rows.count()
-
-    i = 0
-    while i < rcount:
-        tr = rows.nth(i)
-        cells = tr.locator("td")
-        if cells.count() >= 5:
-            title = cells.nth(0).inner_text().strip()
-            dep   = cells.nth(1).inner_text().strip()
-            ret   = cells.nth(2).inner_text().strip()
-            price = cells.nth(3).inner_text().strip()
-            av    = cells.nth(4).inner_text().strip()
-
-            d = to_date_obj(dep)
-            if within_window(d, start_date, end_date):
-                cabins: List[Dict] = []
-                cabins_left = None
-
-                # If next row is a detail row with a cabin table, parse it
-                if i + 1 < rcount:
-                    nxt = rows.nth(i+1)
-                    if "cabin type" in nxt.inner_text().lower():
-                        tbl = nxt.locator("table:has-text('Cabin Type')")
-                        if tbl.count():
-                            body_rows = tbl.nth(0).locator("tbody tr")
-                            for ri in range(body_rows.count()):
-                                tds = body_rows.nth(ri).locator("td").all_inner_texts()
-                                if len(tds) >= 3:
-                                    cabins.append({
-                                        "type": tds[0].strip(),
-                                        "available": extract_int_in_text(tds[1]),
-                                        "priceAUD": parse_money_to_int(tds[2]),
-                                    })
-                            cabins_left = sum((c["available"] or 0) for c in cabins) if cabins else None
-                        i += 1  # Skip detail row in main loop
-
-                trips.append({
-                    "title": title,
-                    "dateText": dep,
-                    "dateReturn": ret,
-                    "priceFromAUD": parse_money_to_int(price),
-                    "availability": norm_availability(av),
-                    "cabinsLeft": cabins_left,
-                    "link": SOURCE_URL,
-                    "cabins": cabins
-                })
-        i += 1
-
-    # Sort by departure date
-    trips.sort(key=lambda t: to_date_obj(t.get("dateText","")) or date(1900,1,1))
-    return trips
+    raw = page.evaluate(
+        """
+        () => {
+          const out = [];
+          const rows = Array.from(document.querySelectorAll('#availability-results table tbody tr'));
+          for (let i = 0; i < rows.length; i++) {
+            const tds = rows[i].querySelectorAll('td');
+            if (tds.length < 5) continue;
+
+            const row = {
+              cells: Array.from(tds).slice(0, 5).map(td => td.innerText.trim()),
+              cabins: null
+            };
+
+            // If next row is a detail row with a cabin table, take its body rows
+            const nxt = rows[i + 1];
+            if (nxt && /cabin type/i.test(nxt.innerText)) {
+              const tbl = Array.from(nxt.querySelectorAll('table'))
+                .find(t => /cabin type/i.test(t.innerText));
+              row.cabins = tbl
+                ? Array.from(tbl.querySelectorAll('tbody tr')).map(cr =>
+                    Array.from(cr.querySelectorAll('td')).map(td => td.innerText))
+                : [];
+              i++;  // Skip detail row in main loop
+            }
+            out.push(row);
+          }
+          return out;
+        }
+        """
+    )
+
+    dated: List[Tuple[date, Dict]] = []
+    for row in raw:
+        title, dep, ret, price, av = row["cells"]
+
+        d = to_date_obj(dep)
+        if not within_window(d, start_date, end_date):
+            continue
+
+        cabins: List[Dict] = []
+        cabins_left = None
+        if row["cabins"] is not None:
+            total = 0
+            for tds in row["cabins"]:
+                if len(tds) >= 3:
+                    available = extract_int_in_text(tds[1])
+                    cabins.append({
+                        "type": tds[0].strip(),
+                        "available": available,
+                        "priceAUD": parse_money_to_int(tds[2]),
+                    })
+                    total += available or 0
+            cabins_left = total if cabins else None
+
+        dated.append((d, {
+            "title": title,
+            "dateText": dep,
+            "dateReturn": ret,
+            "priceFromAUD": parse_money_to_int(price),
+            "availability": norm_availability(av),
+            "cabinsLeft": cabins_left,
+            "link": SOURCE_URL,
+            "cabins": cabins
+        }))
+
+    # Sort by the departure date parsed above, not by re-parsing dateText
+    dated.sort(key=itemgetter(0))
+    return [t for _, t in dated]
 
 # ====================== Scraper runner ======================
 
@@ -237,8 +218,9 @@ def run_scrape(start_date: Optional[date], end_date: Optional[date], headful: bo
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=not headful)
         ctx = browser.new_context(viewport={"width": 1440, "height": 1600})
+        ctx.route("**/*", _block_heavy_requests)
         page = ctx.new_page()
-        page.set_default_timeout(20000)
+        page.set_default_timeout(15000)
 
         try:
             perform_search(page, start_date, end_date)
@@ -296,7 +278,7 @@ def main():
     data = run_scrape(start_d, end_d, headful=args.headful)
 
     with open(args.out, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.write(json.dumps(data, ensure_ascii=False, indent=2))
 
     print(f"✅ Wrote {len(data['trips'])} trips to {args.out}")
 
@@ -15,94 +15,98 @@ Usage:
   python scripts/scrape.py --start 2026-08-02 --end 2027-01-03 --out mikeball_availability.json --headful
 """
 
+from __future__ import annotations
+
 import argparse
 import json
-import re
+import math
+import os
 import sys
+import time
 from datetime import date, datetime, timedelta
-from typing import Any, Dict, List, Optional, Tuple
-
-from playwright.sync_api import BrowserContext, Page, sync_playwright
+from operator import itemgetter
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from scrape_common import (
+    SOURCE_URL,
+    extract_int_in_text,
+    fmt_picker,
+    norm_availability,
+    parse_money_to_int,
+    to_date_obj,
+    within_window,
+)
+
+if TYPE_CHECKING:
+    from playwright.sync_api import Browser, BrowserContext, Page, Route
 
-SOURCE_URL = "https://www.mikeball.com/availability-mike-ball-dive-expeditions/"
 DEFAULT_AJAX_URL = "https://www.mikeball.com/wp-admin/admin-ajax.php"
 
+# Sent with every admin-ajax POST, the way the RESCO widget's own jQuery calls look.
+AJAX_HEADERS = {
+    "X-Requested-With": "XMLHttpRequest",
+    "Referer": SOURCE_URL,
+    "Origin": "https://www.mikeball.com",
+    "Accept": "application/json, text/javascript, */*; q=0.01",
+}
 
-# -------------------- text/date helpers --------------------
+# Nothing the scraper reads depends on these; skipping them keeps page.goto fast.
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "stylesheet"}
+BLOCKED_URL_PARTS = ("googletagmanager", "google-analytics", "facebook", "hotjar", "doubleclick")
 
-def parse_money_to_int(s: Optional[str]) -> Optional[int]:
-    if not s:
-        return None
-    v = re.sub(r"[^\d.]", "", str(s))
-    if not v:
-        return None
-    try:
-        return int(round(float(v)))
-    except Exception:
-        return None
+# Per-request limit for admin-ajax POSTs, both from Python and from the page.
+AJAX_TIMEOUT_MS = 60000
 
+# Default limit for page navigation and other Playwright actions.
+PAGE_TIMEOUT_MS = 15000
 
-def extract_int_in_text(s: Optional[str]) -> Optional[int]:
-    if not s:
-        return None
-    m = re.search(r"\d+", str(s))
-    if not m:
-        return None
-    try:
-        return int(m.group())
-    except Exception:
-        return None
+# Bodies admin-ajax.php sends instead of a handler's reply.
+WP_AJAX_REJECTED = ("0", "-1")
 
+# A connection error, 429 or 5xx from admin-ajax is retried this many times in
+# total, sleeping AJAX_BACKOFF_SEC, then twice that, between attempts.
+AJAX_ATTEMPTS = 3
+AJAX_BACKOFF_SEC = 1.0
 
-def to_date_obj(txt: str) -> Optional[date]:
-    if not txt:
-        return None
+# How many ra_expand_berths requests may be in flight at once.
+BERTH_CONCURRENCY = 6
 
-    clean = re.sub(
-        r"^(Mon|Tue|Wed|Thu|Fri|Sat|Sun|Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday)\s+",
-        "",
-        txt.strip(),
-        flags=re.I,
-    )
 
-    for fmt in ("%d %b %Y", "%d %B %Y"):
-        try:
-            return datetime.strptime(clean, fmt).date()
-        except ValueError:
-            pass
+# -------------------- run budget --------------------
 
-    return None
+class _BudgetExceeded(RuntimeError):
+    pass
 
 
-def fmt_picker(d: date) -> str:
-    # The RESCO script sends this exact human-readable format to admin-ajax.
-    return d.strftime("%A %d %B %Y")
+def _remaining_ms(deadline: Optional[float]) -> Optional[int]:
+    # Milliseconds left before the --budget-sec deadline (None if there is none).
+    if deadline is None:
+        return None
+    left_ms = math.ceil((deadline - time.monotonic()) * 1000)
+    if left_ms <= 0:
+        raise _BudgetExceeded("scrape exceeded its time budget")
+    return left_ms
 
 
-def within_window(d: Optional[date], start: Optional[date], end: Optional[date]) -> bool:
-    if not d:
-        return False
-    if start and d < start:
-        return False
-    if end and d > end:
-        return False
-    return True
+def _budget_ms(deadline: Optional[float], timeout_ms: int) -> int:
+    """
+    Cap a step's timeout to what is left of the run's budget, so running out of
+    budget surfaces as that step's ordinary Playwright TimeoutError instead of
+    something raised into Playwright from outside.
+    """
+    left_ms = _remaining_ms(deadline)
+    return timeout_ms if left_ms is None else min(timeout_ms, left_ms)
 
 
-def norm_availability(s: Optional[str]) -> str:
-    t = (s or "").strip().lower()
-    if not t:
-        return "—"
-    if "sold" in t:
-        return "Sold Out"
-    if "hurry" in t or "few" in t:
-        return "Few left"
-    if "10+" in t or "avail" in t:
-        return "Available"
-    return (s or "").strip()
+# -------------------- HTTP / AJAX helpers --------------------
 
+def _block_heavy_requests(route: Route) -> None:
+    req = route.request
+    if req.resource_type in BLOCKED_RESOURCE_TYPES or any(p in req.url for p in BLOCKED_URL_PARTS):
+        route.abort()
+    else:
+        route.continue_()
 
-# -------------------- HTTP / AJAX helpers --------------------
 
 def _ensure_consent(page: Page) -> None:
     for sel in [
@@ -116,11 +120,22 @@ def _ensure_consent(page: Page) -> None:
             btns = page.locator(sel)
             if btns.count():
                 btns.first.click(timeout=800)
-                page.wait_for_timeout(250)
         except Exception:
             pass
 
 
+def _wait_for_resco(page: Page, timeout: int = 10000) -> None:
+    # The RESCO widget publishes window.rescoAjax once its script has run; if it
+    # never shows up, _get_ajax_url falls back to DEFAULT_AJAX_URL.
+    try:
+        page.wait_for_function(
+            "() => !!(window.rescoAjax && window.rescoAjax.ajaxurl)",
+            timeout=timeout,
+        )
+    except Exception:
+        pass
+
+
 def _get_ajax_url(page: Page) -> str:
     try:
         ajax_url = page.evaluate(
@@ -133,18 +148,34 @@ def _get_ajax_url(page: Page) -> str:
     return DEFAULT_AJAX_URL
 
 
-def _post_ajax(ctx: BrowserContext, ajax_url: str, form: Dict[str, str]) -> Dict[str, Any]:
-    response = ctx.request.post(
-        ajax_url,
-        form=form,
-        headers={
-            "X-Requested-With": "XMLHttpRequest",
-            "Referer": SOURCE_URL,
-            "Origin": "https://www.mikeball.com",
-            "Accept": "application/json, text/javascript, */*; q=0.01",
-        },
-        timeout=60000,
-    )
+def _post_ajax(
+    ctx: BrowserContext,
+    ajax_url: str,
+    form: Dict[str, str],
+    deadline: Optional[float] = None,
+) -> Dict[str, Any]:
+    from playwright.sync_api import Error as PlaywrightError
+    from playwright.sync_api import TimeoutError as PlaywrightTimeout
+
+    for attempt in range(AJAX_ATTEMPTS):
+        retries_left = attempt < AJAX_ATTEMPTS - 1
+        try:
+            response = ctx.request.post(
+                ajax_url,
+                form=form,
+                headers=AJAX_HEADERS,
+                timeout=_budget_ms(deadline, AJAX_TIMEOUT_MS),
+            )
+        except PlaywrightTimeout:
+            # A full minute without an answer is not a blip; don't triple it.
+            raise
+        except PlaywrightError:
+            if not retries_left:
+                raise
+        else:
+            if not (response.status == 429 or response.status >= 500) or not retries_left:
+                break
+        time.sleep(_budget_ms(deadline, int(AJAX_BACKOFF_SEC * 1000) * 2 ** attempt) / 1000)
 
     text = response.text()
 
@@ -154,6 +185,13 @@ def _post_ajax(ctx: BrowserContext, ajax_url: str, form: Dict[str, str]) -> Dict
             f"Response preview: {text[:1000]}"
         )
 
+    # WordPress answers a bare "0" (no handler for the action) or "-1" (nonce or
+    # permission check failed) with HTTP 200; both parse as JSON numbers.
+    if text.strip() in WP_AJAX_REJECTED:
+        raise RuntimeError(
+            f"admin-ajax rejected action {form.get('action')!r} (response {text.strip()!r})"
+        )
+
     try:
         return response.json()
     except Exception:
@@ -172,6 +210,7 @@ def search_availability(
     start_d: date,
     end_d: date,
     expedition: str = "all",
+    deadline: Optional[float] = None,
 ) -> str:
     start_txt = fmt_picker(start_d)
     end_txt = fmt_picker(end_d)
@@ -183,7 +222,7 @@ def search_availability(
         "data[ends_at]": end_txt,
     }
 
-    data = _post_ajax(ctx, ajax_url, payload)
+    data = _post_ajax(ctx, ajax_url, payload, deadline)
 
     if data.get("success") and data.get("html"):
         return str(data["html"])
@@ -194,60 +233,183 @@ def search_availability(
     raise RuntimeError(f"Unexpected Mike Ball search response: {json.dumps(data)[:2000]}")
 
 
-def expand_berths(ctx: BrowserContext, ajax_url: str, depart_id: str) -> Dict[str, Any]:
-    if not depart_id:
+def expand_all_berths(
+    page: Page,
+    ajax_url: str,
+    depart_ids: List[str],
+    deadline: Optional[float] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetch and tabulate the berth details for every departure in one page.evaluate(),
+    instead of one Python-side POST plus one DOM round-trip per departure. Up to
+    BERTH_CONCURRENCY requests run at once, each retried like _post_ajax.
+    `page` must still be on the Mike Ball site so the fetches carry its cookies.
+    Returns {depart_id: {"avail": ..., "rows": [[cell, ...], ...]}}.
+    """
+    if not depart_ids:
         return {}
 
-    payload = {
-        "action": "ra_expand_berths",
-        "data[id]": str(depart_id),
-    }
+    results = page.evaluate(
+        """
+        async ({ajaxUrl, ids, concurrency, rejected, timeoutMs, attempts, backoffMs, budgetMs}) => {
+          const parseRows = (html) => {
+            const div = document.createElement('div');
+            div.innerHTML = html;
+            return Array.from(div.querySelectorAll('tr')).map(tr =>
+              Array.from(tr.children)
+                .filter(el => ['TD', 'TH'].includes(el.tagName))
+                .map(td => (td.innerText || '').replace(/\\s+/g, ' ').trim())
+                .filter(Boolean)
+            ).filter(row => row.length);
+          };
+
+          const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+          const stopAt = budgetMs == null ? Infinity : Date.now() + budgetMs;
+
+          // Same retry policy as _post_ajax: connection errors, 429 and 5xx are
+          // retried with exponential backoff; timeouts are not.
+          const fetchOne = async (id) => {
+            for (let attempt = 0; ; attempt++) {
+              const retriesLeft = attempt < attempts - 1;
+              const left = stopAt - Date.now();
+              if (left <= 0) {
+                return {error: 'run budget exhausted'};
+              }
+              try {
+                let res;
+                try {
+                  res = await fetch(ajaxUrl, {
+                    method: 'POST',
+                    headers: {
+                      'X-Requested-With': 'XMLHttpRequest',
+                      'Accept': 'application/json, text/javascript, */*; q=0.01',
+                    },
+                    body: new URLSearchParams({'action': 'ra_expand_berths', 'data[id]': id}),
+                    // evaluate() has no timeout of its own, so a stalled request
+                    // would otherwise hang the whole run.
+                    signal: AbortSignal.timeout(Math.min(timeoutMs, left)),
+                  });
+                } catch (e) {
+                  if (!retriesLeft || (e && e.name === 'TimeoutError')) throw e;
+                  await sleep(Math.min(backoffMs * 2 ** attempt, stopAt - Date.now()));
+                  continue;
+                }
+                if ((res.status === 429 || res.status >= 500) && retriesLeft) {
+                  await sleep(Math.min(backoffMs * 2 ** attempt, stopAt - Date.now()));
+                  continue;
+                }
+                const text = await res.text();
+                if (!res.ok) {
+                  return {error: `HTTP ${res.status}. Response preview: ${text.slice(0, 500)}`};
+                }
+                if (rejected.includes(text.trim())) {
+                  return {error: `admin-ajax rejected ra_expand_berths (response '${text.trim()}')`};
+                }
+                let data;
+                try {
+                  data = JSON.parse(text);
+                } catch (e) {
+                  return {error: `AJAX response was not JSON. Response preview: ${text.slice(0, 500)}`};
+                }
+                return {
+                  avail: data && data.avail != null ? String(data.avail) : null,
+                  rows: data && data.berths ? parseRows(String(data.berths)) : [],
+                };
+              } catch (e) {
+                return {error: String(e)};
+              }
+            }
+          };
+
+          // A few workers drain the queue so departures are fetched concurrently
+          // without flooding admin-ajax.
+          const out = {};
+          const queue = ids.slice();
+          const worker = async () => {
+            while (queue.length) {
+              const id = queue.shift();
+              out[id] = await fetchOne(id);
+            }
+          };
+          await Promise.all(Array.from({length: Math.min(concurrency, ids.length)}, worker));
+          return out;
+        }
+        """,
+        {
+            "ajaxUrl": ajax_url,
+            "ids": depart_ids,
+            "concurrency": BERTH_CONCURRENCY,
+            "rejected": list(WP_AJAX_REJECTED),
+            "timeoutMs": AJAX_TIMEOUT_MS,
+            "attempts": AJAX_ATTEMPTS,
+            "backoffMs": int(AJAX_BACKOFF_SEC * 1000),
+            "budgetMs": _remaining_ms(deadline),
+        },
+    )
 
-    try:
-        return _post_ajax(ctx, ajax_url, payload)
-    except Exception as exc:
-        # A single cabin-detail failure should not kill the whole feed.
-        print(f"Warning: could not expand berths for departure {depart_id}: {exc}", file=sys.stderr)
-        return {}
+    # Departures cut short by the budget come back as errors; fail the run
+    # rather than publish them without cabins.
+    _remaining_ms(deadline)
+
+    berths: Dict[str, Dict[str, Any]] = {}
+    for depart_id, result in results.items():
+        if result.get("error"):
+            # A single cabin-detail failure should not kill the whole feed.
+            print(
+                f"Warning: could not expand berths for departure {depart_id}: {result['error']}",
+                file=sys.stderr,
+            )
+            continue
+        berths[depart_id] = result
+    return berths
 
 
 # -------------------- HTML parsing via Playwright DOM --------------------
 
-def _extract_summary_rows(page: Page, html: str) -> List[Dict[str, Any]]:
-    page.set_content(
-        "<!doctype html><html><body><div id='availability-results'>"
-        + html
-        + "</div></body></html>",
-        wait_until="domcontentloaded",
-    )
+def _extract_summary_rows(
+    ctx: BrowserContext,
+    html: str,
+    deadline: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    # Parse on a throwaway page: the live site page must keep its origin for the
+    # berth fetches, and closing this one frees the results DOM straight away.
+    page = ctx.new_page()
+    try:
+        page.set_content(
+            "<!doctype html><html><body><div id='availability-results'>"
+            + html
+            + "</div></body></html>",
+            wait_until="domcontentloaded",
+            timeout=_budget_ms(deadline, PAGE_TIMEOUT_MS),
+        )
 
-    return page.evaluate(
-        """
-        () => {
-          const rows = [];
-          document.querySelectorAll('#availability-results table tbody tr').forEach((tr) => {
-            if (tr.classList.contains('berth-row')) return;
-
-            const cells = Array.from(tr.children)
-              .filter(el => el.tagName === 'TD')
-              .map(td => (td.innerText || '').replace(/\\s+/g, ' ').trim());
-
-            if (cells.length < 3) return;
-
-            rows.push({
-              id: tr.getAttribute('data-id') || tr.dataset.id || '',
-              dataDate: tr.getAttribute('data-date') || tr.dataset.date || '',
-              className: tr.className || '',
-              cells: cells,
-              availabilityText: tr.querySelector('.depart-avail')
-                ? tr.querySelector('.depart-avail').innerText.replace(/\\s+/g, ' ').trim()
-                : ''
-            });
-          });
-          return rows;
-        }
-        """
-    )
+        return page.evaluate(
+            """
+            () => {
+              const rows = [];
+              document.querySelectorAll('#availability-results table tbody tr').forEach((tr) => {
+                if (tr.classList.contains('berth-row')) return;
+
+                const cells = Array.from(tr.querySelectorAll(':scope > td'))
+                  .map(td => (td.innerText || '').replace(/\\s+/g, ' ').trim());
+
+                if (cells.length < 3) return;
+
+                const avail = tr.querySelector('.depart-avail');
+                rows.push({
+                  id: tr.getAttribute('data-id') || tr.dataset.id || '',
+                  dataDate: tr.getAttribute('data-date') || tr.dataset.date || '',
+                  className: tr.className || '',
+                  cells: cells,
+                  availabilityText: avail ? avail.innerText.replace(/\\s+/g, ' ').trim() : ''
+                });
+              });
+              return rows;
+            }
+            """
+        )
+    finally:
+        page.close()
 
 
 def _find_trip_fields(cells: List[str]) -> Tuple[str, str, str, str, str]:
@@ -259,6 +421,8 @@ def _find_trip_fields(cells: List[str]) -> Tuple[str, str, str, str, str]:
     for i, text in enumerate(cells):
         if to_date_obj(text):
             date_indices.append(i)
+            if len(date_indices) == 2:
+                break
 
     if len(date_indices) >= 2:
         dep_i, ret_i = date_indices[0], date_indices[1]
@@ -289,27 +453,13 @@ def _find_trip_fields(cells: List[str]) -> Tuple[str, str, str, str, str]:
     return padded[0], padded[1], padded[2], padded[3], padded[4]
 
 
-def _parse_cabins_from_html(page: Page, berths_html: str) -> List[Dict[str, Any]]:
-    if not berths_html:
-        return []
-
-    rows = page.evaluate(
-        """
-        (html) => {
-          const div = document.createElement('div');
-          div.innerHTML = html;
-          return Array.from(div.querySelectorAll('tr')).map(tr =>
-            Array.from(tr.children)
-              .filter(el => ['TD', 'TH'].includes(el.tagName))
-              .map(td => (td.innerText || '').replace(/\\s+/g, ' ').trim())
-              .filter(Boolean)
-          ).filter(row => row.length);
-        }
-        """,
-        berths_html,
-    )
-
+def _cabins_from_rows(rows: List[List[str]]) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """
+    Returns (cabins, cabins_left); cabins_left is the berth total summed while the
+    rows are parsed, or None when the table has no cabin rows.
+    """
     cabins: List[Dict[str, Any]] = []
+    cabins_left = 0
     for row in rows:
         if not row:
             continue
@@ -319,124 +469,187 @@ def _parse_cabins_from_html(page: Page, berths_html: str) -> List[Dict[str, Any]
             continue
 
         if len(row) >= 3:
+            available = extract_int_in_text(row[1])
             cabins.append(
                 {
                     "type": row[0],
-                    "available": extract_int_in_text(row[1]),
+                    "available": available,
                     "priceAUD": parse_money_to_int(row[2]),
                 }
             )
+            cabins_left += available or 0
 
-    return cabins
+    return cabins, (cabins_left if cabins else None)
 
 
 def extract_trips(
     page: Page,
-    ctx: BrowserContext,
     ajax_url: str,
     html: str,
     start_date: Optional[date],
     end_date: Optional[date],
+    deadline: Optional[float] = None,
 ) -> List[Dict[str, Any]]:
-    summary_rows = _extract_summary_rows(page, html)
-    trips: List[Dict[str, Any]] = []
+    summary_rows = _extract_summary_rows(page.context, html, deadline)
 
+    # Keyed by (title, departs, returns, departure id) so a departure listed
+    # twice is only expanded once. Rows with different ids stay separate; a row
+    # without an id gives way to one with an id for the same trip.
+    by_key: Dict[Tuple[str, str, str, str], Tuple[Dict[str, Any], Tuple[str, ...], date]] = {}
+    trips_with_id = set()
     for row in summary_rows:
-        cells = row.get("cells", [])
-        title, dep, ret, price, availability = _find_trip_fields(cells)
-        dep_date = to_date_obj(dep)
-
+        fields = _find_trip_fields(row.get("cells", []))
+        dep_date = to_date_obj(fields[1])
         if not within_window(dep_date, start_date, end_date):
             continue
 
+        trip = (fields[0], fields[1], fields[2])
         depart_id = str(row.get("id") or "")
+        if depart_id:
+            by_key.pop(trip + ("",), None)
+            trips_with_id.add(trip)
+        elif trip in trips_with_id:
+            continue
+        by_key.setdefault(trip + (depart_id,), (row, fields, dep_date))
+
+    in_window = list(by_key.values())
+    depart_ids = [str(row.get("id") or "") for row, _, _ in in_window]
+    berths = expand_all_berths(page, ajax_url, [i for i in depart_ids if i], deadline)
+
+    # (departure date, trip) pairs, so the sort below doesn't re-parse dateText.
+    dated: List[Tuple[date, Dict[str, Any]]] = []
+
+    for (row, fields, dep_date), depart_id in zip(in_window, depart_ids):
+        title, dep, ret, price, availability = fields
         cabins: List[Dict[str, Any]] = []
         cabins_left: Optional[int] = None
 
-        if depart_id:
-            berth_response = expand_berths(ctx, ajax_url, depart_id)
-            cabins = _parse_cabins_from_html(page, str(berth_response.get("berths", "")))
-
-            if cabins:
-                cabins_left = sum((c.get("available") or 0) for c in cabins)
+        berth_response = berths.get(depart_id)
+        if berth_response:
+            cabins, cabins_left = _cabins_from_rows(berth_response.get("rows") or [])
 
             if berth_response.get("avail") not in (None, ""):
                 availability = str(berth_response.get("avail"))
 
-        trips.append(
-            {
-                "title": title,
-                "dateText": dep,
-                "dateReturn": ret,
-                "priceFromAUD": parse_money_to_int(price),
-                "availability": norm_availability(availability or row.get("availabilityText")),
-                "cabinsLeft": cabins_left,
-                "link": SOURCE_URL,
-                "cabins": cabins,
-                "sourceId": depart_id,
-            }
+        dated.append(
+            (
+                dep_date,
+                {
+                    "title": title,
+                    "dateText": dep,
+                    "dateReturn": ret,
+                    "priceFromAUD": parse_money_to_int(price),
+                    "availability": norm_availability(availability or row.get("availabilityText")),
+                    "cabinsLeft": cabins_left,
+                    "link": SOURCE_URL,
+                    "cabins": cabins,
+                    "sourceId": depart_id,
+                },
+            )
         )
 
-    trips.sort(key=lambda t: to_date_obj(t.get("dateText", "")) or date(1900, 1, 1))
-    return trips
+    dated.sort(key=itemgetter(0))
+    return [trip for _, trip in dated]
 
 
 # -------------------- runner --------------------
 
-def run_scrape(start_date: date, end_date: date, headful: bool = False) -> Dict[str, Any]:
+def _scrape_in_context(
+    browser: Browser,
+    start_date: date,
+    end_date: date,
+    state_path: Optional[str],
+    use_state: bool,
+    deadline: Optional[float],
+) -> List[Dict[str, Any]]:
+    ctx = browser.new_context(
+        locale="en-AU",
+        timezone_id="Australia/Brisbane",
+        user_agent=(
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+            "AppleWebKit/537.36 (KHTML, like Gecko) "
+            "Chrome/124.0.0.0 Safari/537.36"
+        ),
+        viewport={"width": 1440, "height": 1600},
+        # Reuse cookies from the previous run so the site doesn't start cold.
+        storage_state=state_path if use_state else None,
+    )
+    ctx.route("**/*", _block_heavy_requests)
+
+    ctx.set_default_timeout(_budget_ms(deadline, PAGE_TIMEOUT_MS))
+    page = ctx.new_page()
+
+    try:
+        page.goto(
+            SOURCE_URL,
+            wait_until="domcontentloaded",
+            timeout=_budget_ms(deadline, PAGE_TIMEOUT_MS),
+        )
+        _wait_for_resco(page, timeout=_budget_ms(deadline, 10000))
+        _ensure_consent(page)
+
+        ajax_url = _get_ajax_url(page)
+        html = search_availability(ctx, ajax_url, start_date, end_date, "all", deadline)
+        trips = extract_trips(page, ajax_url, html, start_date, end_date, deadline)
+
+        if state_path:
+            ctx.storage_state(path=state_path)
+        return trips
+    except Exception as exc:
+        try:
+            page.screenshot(path="debug_screen.png", full_page=True)
+            with open("debug_page.html", "w", encoding="utf-8") as f:
+                try:
+                    f.write(page.content())
+                except Exception:
+                    f.write("")
+                f.write("\n\n<!-- scraper_error:\n")
+                f.write(str(exc))
+                f.write("\n-->\n")
+            print("❌ Error; saved debug_screen.png and debug_page.html")
+        except Exception:
+            pass
+        raise
+    finally:
+        ctx.close()
+
+
+def run_scrape(
+    start_date: date,
+    end_date: date,
+    headful: bool = False,
+    state_path: Optional[str] = None,
+    deadline: Optional[float] = None,
+) -> Dict[str, Any]:
+    # Imported here so --help and argument errors don't pay for loading Playwright.
+    from playwright.sync_api import sync_playwright
+
     with sync_playwright() as p:
         browser = p.chromium.launch(
             headless=not headful,
-            args=["--disable-blink-features=AutomationControlled"],
-        )
-
-        ctx = browser.new_context(
-            locale="en-AU",
-            timezone_id="Australia/Brisbane",
-            user_agent=(
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/124.0.0.0 Safari/537.36"
-            ),
-            viewport={"width": 1440, "height": 1600},
+            timeout=_budget_ms(deadline, 30000),
+            args=[
+                "--disable-blink-features=AutomationControlled",
+                # CI containers have a tiny /dev/shm and no GPU; nothing here needs extensions.
+                "--disable-dev-shm-usage",
+                "--disable-gpu",
+                "--disable-extensions",
+            ],
         )
 
-        page = ctx.new_page()
-        page.set_default_timeout(30000)
-
         try:
-            page.goto(SOURCE_URL, wait_until="domcontentloaded")
-            page.wait_for_timeout(4000)
-            _ensure_consent(page)
-
-            ajax_url = _get_ajax_url(page)
-            html = search_availability(ctx, ajax_url, start_date, end_date, "all")
-            trips = extract_trips(page, ctx, ajax_url, html, start_date, end_date)
-
-            # Helpful debug files even on success.
-            page.set_content(
-                "<!doctype html><html><body><div id='availability-results'>"
-                + html
-                + "</div></body></html>",
-                wait_until="domcontentloaded",
-            )
-        except Exception as exc:
+            use_state = bool(state_path and os.path.exists(state_path))
             try:
-                page.screenshot(path="debug_screen.png", full_page=True)
-                with open("debug_page.html", "w", encoding="utf-8") as f:
-                    try:
-                        f.write(page.content())
-                    except Exception:
-                        f.write("")
-                    f.write("\n\n<!-- scraper_error:\n")
-                    f.write(str(exc))
-                    f.write("\n-->\n")
-                print("❌ Error; saved debug_screen.png and debug_page.html")
+                trips = _scrape_in_context(browser, start_date, end_date, state_path, use_state, deadline)
             except Exception:
-                pass
-            raise
+                # The state is only re-saved after a good run, so a bad cookie jar
+                # would keep being restored; drop it and retry once from cold.
+                if not use_state or (deadline is not None and time.monotonic() >= deadline):
+                    raise
+                print("⚠️ Run with saved browser state failed; retrying with a fresh context", file=sys.stderr)
+                os.remove(state_path)
+                trips = _scrape_in_context(browser, start_date, end_date, state_path, False, deadline)
         finally:
-            ctx.close()
             browser.close()
 
     return {
@@ -459,7 +672,33 @@ def parse_args() -> argparse.Namespace:
     )
     ap.add_argument("--out", default="mikeball_availability.json", help="Output JSON path")
     ap.add_argument("--headful", action="store_true", help="Show browser window")
-    return ap.parse_args()
+    ap.add_argument(
+        "--state",
+        help="Browser storage-state JSON to load before and save after a successful run",
+    )
+    ap.add_argument(
+        "--budget-sec",
+        type=int,
+        help="Abort the whole scrape (exit code 2) if it runs longer than this many seconds",
+    )
+    ap.add_argument(
+        "--skip-unchanged",
+        action="store_true",
+        help="Leave --out untouched (including scrapedAt) if its trips already match this run",
+    )
+    args = ap.parse_args()
+    if args.budget_sec is not None and args.budget_sec <= 0:
+        ap.error("--budget-sec must be a positive number of seconds")
+    return args
+
+
+def _trips_unchanged(path: str, trips: List[Dict[str, Any]]) -> bool:
+    try:
+        with open(path, encoding="utf-8") as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return isinstance(previous, dict) and previous.get("trips") == trips
 
 
 def main() -> None:
@@ -477,10 +716,27 @@ def main() -> None:
         start_d = today + timedelta(days=28)
         end_d = today + timedelta(days=182)
 
-    data = run_scrape(start_d, end_d, headful=args.headful)
+    # One deadline for the whole run, however the individual Playwright and
+    # AJAX timeouts add up. Each step's timeout is capped to what is left, so
+    # the run fails through run_scrape's normal error handling (debug files
+    # included) once the budget is spent.
+    deadline = time.monotonic() + args.budget_sec if args.budget_sec else None
+    try:
+        data = run_scrape(
+            start_d, end_d, headful=args.headful, state_path=args.state, deadline=deadline
+        )
+    except Exception:
+        if deadline is not None and time.monotonic() >= deadline:
+            print(f"❌ Gave up after the {args.budget_sec}s budget", file=sys.stderr)
+            sys.exit(2)
+        raise
+
+    if args.skip_unchanged and _trips_unchanged(args.out, data["trips"]):
+        print(f"⏭ {len(data['trips'])} trips unchanged; left {args.out} as is")
+        return
 
     with open(args.out, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.write(json.dumps(data, ensure_ascii=False, indent=2))
 
     print(f"✅ Wrote {len(data['trips'])} trips to {args.out}")
 
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+
+"""
+Text/date helpers shared by the Mike Ball scrapers.
+
+Imported by scripts/scrape.py (run from scripts/) and by the older
+scrape_mikeball.py at the repo root (as scripts.scrape_common).
+"""
+
+import re
+from datetime import date
+from functools import lru_cache
+from typing import Optional
+
+SOURCE_URL = "https://www.mikeball.com/availability-mike-ball-dive-expeditions/"
+
+_WEEKDAY_RE = re.compile(
+    r"^(Mon|Tue|Wed|Thu|Fri|Sat|Sun|Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday)\s+",
+    re.I,
+)
+
+# Lower-cased English month names and abbreviations, as "%d %b %Y"/"%d %B %Y"
+# accepted them. Spelled out so parsing doesn't depend on the process locale.
+_MONTHS = {
+    key: i
+    for i, name in enumerate(
+        ("January", "February", "March", "April", "May", "June", "July",
+         "August", "September", "October", "November", "December"),
+        start=1,
+    )
+    for key in (name.lower(), name[:3].lower())
+}
+
+
+# -------------------- text/date helpers --------------------
+
+@lru_cache(maxsize=1024)
+def parse_money_to_int(s: Optional[str]) -> Optional[int]:
+    # "$4,802" -> 4802 in one pass over the characters; prices are whole AUD,
+    # so anything after the decimal point only decides the rounding, which is
+    # half-to-even like the round(float(...)) this replaced.
+    if not s:
+        return None
+    text = str(s)
+    n = 0
+    seen = False
+    for i, ch in enumerate(text):
+        if "0" <= ch <= "9":
+            n = n * 10 + ord(ch) - 48
+            seen = True
+        elif ch.isdecimal():
+            n = n * 10 + int(ch)
+            seen = True
+        elif ch == "." and seen:
+            frac = ""
+            for f in text[i + 1:]:
+                if not f.isdecimal():
+                    break
+                frac += str(int(f))
+            if frac[:1] > "5" or frac[:1] == "5" and (frac[1:].strip("0") or n % 2):
+                n += 1
+            break
+    return n if seen else None
+
+
+@lru_cache(maxsize=1024)
+def extract_int_in_text(s: Optional[str]) -> Optional[int]:
+    # First run of digits, e.g. "10+ - See more" -> 10.
+    if not s:
+        return None
+    n = 0
+    seen = False
+    for ch in str(s):
+        if "0" <= ch <= "9":
+            n = n * 10 + ord(ch) - 48
+            seen = True
+        elif ch.isdecimal():
+            n = n * 10 + int(ch)
+            seen = True
+        elif seen:
+            break
+    return n if seen else None
+
+
+@lru_cache(maxsize=4096)
+def to_date_obj(txt: str) -> Optional[date]:
+    if not txt:
+        return None
+
+    clean = txt.strip()
+    # Every accepted format ends in the year, so titles, prices and
+    # availability cells are rejected before any further parsing.
+    if not clean[-4:].isdigit():
+        return None
+
+    # Only a leading weekday needs the regex; "07 Sep 2026" skips it.
+    if clean[:1].isalpha():
+        clean = _WEEKDAY_RE.sub("", clean)
+
+    # "07 Sep 2026" / "7 September 2026": a dict lookup and two int()s instead
+    # of strptime's format parsing and exception-driven fallback.
+    parts = clean.split()
+    if len(parts) != 3:
+        return None
+    day, month_name, year = parts
+    month = _MONTHS.get(month_name.lower())
+    if not month or not day.isdigit() or len(day) > 2 or len(year) != 4:
+        return None
+    try:
+        return date(int(year), month, int(day))
+    except ValueError:
+        return None
+
+
+def fmt_picker(d: date) -> str:
+    # The RESCO script sends this exact human-readable format to admin-ajax.
+    return d.strftime("%A %d %B %Y")
+
+
+def within_window(d: Optional[date], start: Optional[date], end: Optional[date]) -> bool:
+    if not d:
+        return False
+    if start and d < start:
+        return False
+    if end and d > end:
+        return False
+    return True
+
+
+def norm_availability(s: Optional[str]) -> str:
+    t = (s or "").strip().lower()
+    if not t:
+        return "—"
+    if "sold" in t:
+        return "Sold Out"
+    if "hurry" in t or "few" in t:
+        return "Few left"
+    if "10+" in t or "avail" in t:
+        return "Available"
+    return (s or "").strip()